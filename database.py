@@ -1,10 +1,16 @@
 import os
+import atexit
 import logging
+import queue
+import threading
+import time
 from datetime import datetime
-from typing import List, Optional, Dict, Any
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text, Boolean, BigInteger
+from typing import List, Optional, Dict, Any, Tuple
+from sqlalchemy import create_engine, event, insert, select, func, case, text, Index, Column, Integer, String, DateTime, Text, Boolean, BigInteger
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.exc import SQLAlchemyError
 
 # Configure logging
@@ -15,11 +21,38 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_PATH = os.path.join(BASE_DIR, "maveli.db")
 DATABASE_URL = f"sqlite:///{DB_PATH}"
 
-# check_same_thread=False allows usage across threads (e.g., TeleBot handlers)
+# check_same_thread=False allows usage across threads (e.g., TeleBot handlers).
+# QueuePool keeps connections open between calls so each handler reuses a warm
+# connection (and its PRAGMA settings) instead of reopening the DB file.
 engine = create_engine(
     DATABASE_URL,
-    connect_args={"check_same_thread": False}
+    connect_args={"check_same_thread": False},
+    poolclass=QueuePool,
+    pool_size=5,
+    max_overflow=10,
+    pool_recycle=3600,
+    pool_pre_ping=True,
+    query_cache_size=1200  # compiled-statement cache shared by the hot queries
 )
+
+# SQLite tuning applied to every new DB-API connection: WAL lets readers run
+# alongside the writer, and NORMAL sync avoids an fsync on every commit
+SQLITE_PRAGMAS = (
+    "journal_mode=WAL",
+    "synchronous=NORMAL",
+    "temp_store=MEMORY",
+    "mmap_size=268435456",
+    "cache_size=-65536",
+    "foreign_keys=ON",
+)
+
+@event.listens_for(engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(f"PRAGMA {pragma}")
+    cursor.close()
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
@@ -39,7 +72,7 @@ class Conversation(Base):
     __tablename__ = "conversations"
     
     id = Column(Integer, primary_key=True, autoincrement=True)
-    user_id = Column(BigInteger, index=True)  # Telegram user ID
+    user_id = Column(BigInteger)  # Telegram user ID; indexed with timestamp below
     user_message = Column(Text, nullable=False)
     bot_response = Column(Text, nullable=False)
     timestamp = Column(DateTime, default=datetime.utcnow, index=True)
@@ -47,179 +80,258 @@ class Conversation(Base):
     audio_generated = Column(Boolean, default=False)
     language_detected = Column(String(10), nullable=True)
 
-class BotStats(Base):
-    __tablename__ = "bot_stats"
+class WikiCache(Base):
+    __tablename__ = "wiki_cache"
     
-    id = Column(Integer, primary_key=True, autoincrement=True)
-    date = Column(DateTime, default=datetime.utcnow, index=True)
-    total_messages = Column(Integer, default=0)
-    successful_responses = Column(Integer, default=0)
-    failed_responses = Column(Integer, default=0)
-    audio_generations = Column(Integer, default=0)
-    unique_users = Column(Integer, default=0)
+    query = Column(Text, primary_key=True)  # Normalized (lowercased, stripped) query
+    summary = Column(Text, nullable=False)
+    fetched_at = Column(DateTime, default=datetime.utcnow)
+
+# Serves "latest N conversations for a user" as an ordered index range scan
+conversation_user_timestamp_index = Index(
+    "ix_conversations_user_id_timestamp",
+    Conversation.user_id,
+    Conversation.timestamp.desc()
+)
 
 # Create tables
 Base.metadata.create_all(bind=engine)
+# create_all only builds indexes alongside new tables, so add to existing DBs too
+conversation_user_timestamp_index.create(bind=engine, checkfirst=True)
+# The composite index's user_id prefix makes the old single-column index redundant
+with engine.begin() as connection:
+    connection.execute(text("DROP INDEX IF EXISTS ix_conversations_user_id"))
+
+# Conversations are buffered and written in batches by a background thread
+CONVERSATION_BATCH_SIZE = 50
+CONVERSATION_FLUSH_INTERVAL = 2.0  # seconds to wait for a batch to fill
+
+# Formatted prompt context is cached per user until they get a new conversation
+CONTEXT_CACHE_TTL = 60.0  # seconds
+CONTEXT_CACHE_MAX_USERS = 10000
+CONTEXT_VERSION_SLOTS = 1024  # invalidation counters, shared by user_id modulo
 
 class DatabaseManager:
     def __init__(self):
         self.engine = engine
+        self._conversation_queue = queue.Queue()
+        self._flusher = threading.Thread(
+            target=self._conversation_flush_loop,
+            name="conversation-flusher",
+            daemon=True
+        )
+        self._flusher.start()
+        atexit.register(self.flush_conversations)
+        # user_id -> {limit: (built_at, context)}
+        self._context_cache: Dict[int, Dict[int, tuple]] = {}
+        # Bumped on every invalidation so a context built from rows read before
+        # a new conversation landed is never stored
+        self._context_versions = [0] * CONTEXT_VERSION_SLOTS
+        self._context_cache_lock = threading.Lock()
         
     def get_session(self):
+        """Return a new session; use as a context manager so its connection
+        goes back to the pool (rolled back if uncommitted) on exit"""
         return SessionLocal()
     
     def create_or_update_user(self, user_id: int, username: str = None, 
                             first_name: str = None, last_name: str = None) -> bool:
         """Create or update user information"""
         try:
-            session = self.get_session()
-            
-            user = session.query(User).filter(User.id == user_id).first()
-            if user:
-                # Update existing user
-                user.username = username
-                user.first_name = first_name
-                user.last_name = last_name
-                user.last_seen = datetime.utcnow()
-                user.message_count += 1
-            else:
-                # Create new user
-                user = User(
-                    id=user_id,
-                    username=username,
-                    first_name=first_name,
-                    last_name=last_name,
-                    message_count=1
-                )
-                session.add(user)
+            # Single-statement UPSERT instead of SELECT then INSERT/UPDATE
+            stmt = sqlite_insert(User).values(
+                id=user_id,
+                username=username,
+                first_name=first_name,
+                last_name=last_name,
+                message_count=1
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[User.id],
+                set_={
+                    'username': stmt.excluded.username,
+                    'first_name': stmt.excluded.first_name,
+                    'last_name': stmt.excluded.last_name,
+                    'last_seen': datetime.utcnow(),
+                    'message_count': User.message_count + 1
+                }
+            )
             
-            session.commit()
-            session.close()
+            with self.get_session() as session:
+                session.execute(stmt)
+                session.commit()
             return True
             
         except SQLAlchemyError as e:
             logger.error(f"Database error creating/updating user: {e}")
-            if 'session' in locals():
-                session.rollback()
-                session.close()
             return False
     
     def save_conversation(self, user_id: int, user_message: str, bot_response: str,
                          response_time_ms: int = None, audio_generated: bool = False,
-                         language_detected: str = None) -> bool:
-        """Save a conversation to the database"""
-        try:
-            session = self.get_session()
-            
-            conversation = Conversation(
-                user_id=user_id,
-                user_message=user_message,
-                bot_response=bot_response,
-                response_time_ms=response_time_ms,
-                audio_generated=audio_generated,
-                language_detected=language_detected
-            )
+                         language_detected: str = None, timestamp: datetime = None) -> bool:
+        """Queue a conversation to be saved by the background flusher"""
+        self._conversation_queue.put({
+            'user_id': user_id,
+            'user_message': user_message,
+            'bot_response': bot_response,
+            'response_time_ms': response_time_ms,
+            'audio_generated': audio_generated,
+            'language_detected': language_detected,
+            # Stamp now (or use the caller's UTC time), not when the batch is written
+            'timestamp': timestamp or datetime.utcnow()
+        })
+        self._invalidate_context(user_id)
+        return True
+    
+    def flush_conversations(self, timeout: float = 5.0) -> bool:
+        """Write all queued conversations now (e.g. on shutdown)"""
+        done = threading.Event()
+        self._conversation_queue.put(done)
+        return done.wait(timeout)
+    
+    def _conversation_flush_loop(self):
+        """Collect queued conversations into batches and write each in one transaction"""
+        while True:
+            batch = []
+            flush_event = None
+            item = self._conversation_queue.get()
+            deadline = time.monotonic() + CONVERSATION_FLUSH_INTERVAL
+            while True:
+                if isinstance(item, threading.Event):
+                    flush_event = item
+                    break
+                batch.append(item)
+                remaining = deadline - time.monotonic()
+                if len(batch) >= CONVERSATION_BATCH_SIZE or remaining <= 0:
+                    break
+                try:
+                    item = self._conversation_queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
             
-            session.add(conversation)
-            session.commit()
-            session.close()
+            if batch:
+                self.save_conversation_batch(batch)
+            if flush_event is not None:
+                flush_event.set()
+    
+    def save_conversation_batch(self, rows: List[Dict[str, Any]]) -> bool:
+        """Insert conversation rows (save_conversation kwargs plus timestamp)
+        in one transaction with a single executemany"""
+        if not rows:
+            return True
+        try:
+            with self.get_session() as session:
+                session.execute(insert(Conversation), rows)
+                session.commit()
+            # Drop contexts that may have been rebuilt before these rows landed
+            for user_id in {row['user_id'] for row in rows}:
+                self._invalidate_context(user_id)
             return True
             
         except SQLAlchemyError as e:
-            logger.error(f"Database error saving conversation: {e}")
-            if 'session' in locals():
-                session.rollback()
-                session.close()
+            logger.error(f"Database error saving {len(rows)} conversations: {e}")
             return False
     
     def get_user_conversation_history(self, user_id: int, limit: int = 10) -> List[Dict[str, Any]]:
         """Get recent conversation history for a user"""
         try:
-            session = self.get_session()
-            
-            conversations = session.query(Conversation)\
-                .filter(Conversation.user_id == user_id)\
-                .order_by(Conversation.timestamp.desc())\
-                .limit(limit)\
-                .all()
+            with self.get_session() as session:
+                # Core select of just the needed columns skips ORM object construction
+                history = session.execute(
+                    select(
+                        Conversation.user_message,
+                        Conversation.bot_response,
+                        Conversation.timestamp,
+                        Conversation.audio_generated
+                    )
+                    .where(Conversation.user_id == user_id)
+                    .order_by(Conversation.timestamp.desc())
+                    .limit(limit)
+                ).mappings().all()
             
-            history = []
-            for conv in conversations:
-                history.append({
-                    'user_message': conv.user_message,
-                    'bot_response': conv.bot_response,
-                    'timestamp': conv.timestamp,
-                    'audio_generated': conv.audio_generated
-                })
-            
-            session.close()
-            return list(reversed(history))  # Return in chronological order
+            return [dict(row) for row in reversed(history)]  # Return in chronological order
             
         except SQLAlchemyError as e:
             logger.error(f"Database error getting conversation history: {e}")
-            if 'session' in locals():
-                session.close()
             return []
     
     def get_conversation_context(self, user_id: int, limit: int = 5) -> str:
         """Get formatted conversation context for AI prompt"""
+        now = time.monotonic()
+        slot = user_id % CONTEXT_VERSION_SLOTS
+        with self._context_cache_lock:
+            cached = self._context_cache.get(user_id, {}).get(limit)
+            version = self._context_versions[slot]
+        if cached and now - cached[0] < CONTEXT_CACHE_TTL:
+            return cached[1]
+        
         history = self.get_user_conversation_history(user_id, limit)
         
-        if not history:
-            return ""
+        context = ""
+        if history:
+            context = "\n\nഞങ്ങളുടെ പഴയ സംഭാഷണം:\n"
+            for conv in history:
+                context += f"ഉപയോക്താവ്: {conv['user_message']}\n"
+                context += f"മാവേലി: {conv['bot_response']}\n\n"
         
-        context = "\n\nഞങ്ങളുടെ പഴയ സംഭാഷണം:\n"
-        for conv in history:
-            context += f"ഉപയോക്താവ്: {conv['user_message']}\n"
-            context += f"മാവേലി: {conv['bot_response']}\n\n"
+        with self._context_cache_lock:
+            if self._context_versions[slot] != version:
+                return context  # invalidated while we were reading
+            if user_id not in self._context_cache and len(self._context_cache) >= CONTEXT_CACHE_MAX_USERS:
+                # Evict the user cached longest ago
+                self._context_cache.pop(next(iter(self._context_cache)))
+            self._context_cache.setdefault(user_id, {})[limit] = (now, context)
         
         return context
     
+    def _invalidate_context(self, user_id: int):
+        """Forget cached prompt contexts for a user"""
+        with self._context_cache_lock:
+            self._context_versions[user_id % CONTEXT_VERSION_SLOTS] += 1
+            self._context_cache.pop(user_id, None)
+    
     def get_recent_conversations(self, limit: int = 20) -> List[Dict[str, Any]]:
         """Get recent conversations across all users for dashboard"""
         try:
-            session = self.get_session()
-            
-            conversations = session.query(Conversation)\
-                .order_by(Conversation.timestamp.desc())\
-                .limit(limit)\
-                .all()
-            
-            result = []
-            for conv in conversations:
-                # Get user info
-                user = session.query(User).filter(User.id == conv.user_id).first()
-                user_name = user.first_name if user else "Unknown"
+            with self.get_session() as session:
+                rows = session.query(Conversation, User)\
+                    .outerjoin(User, User.id == Conversation.user_id)\
+                    .order_by(Conversation.timestamp.desc())\
+                    .limit(limit)\
+                    .all()
                 
-                result.append({
-                    'timestamp': conv.timestamp,
-                    'user_id': conv.user_id,
-                    'user_name': user_name,
-                    'message': conv.user_message,
-                    'response': conv.bot_response,
-                    'audio_generated': conv.audio_generated
-                })
+                result = []
+                for conv, user in rows:
+                    user_name = user.first_name if user else "Unknown"
+                    
+                    result.append({
+                        'timestamp': conv.timestamp,
+                        'user_id': conv.user_id,
+                        'user_name': user_name,
+                        'message': conv.user_message,
+                        'response': conv.bot_response,
+                        'audio_generated': conv.audio_generated
+                    })
             
-            session.close()
             return result
             
         except SQLAlchemyError as e:
             logger.error(f"Database error getting recent conversations: {e}")
-            if 'session' in locals():
-                session.close()
             return []
     
     def get_user_stats(self) -> Dict[str, Any]:
         """Get user statistics for dashboard"""
         try:
-            session = self.get_session()
-            
-            total_users = session.query(User).count()
-            active_users = session.query(User).filter(User.is_active == True).count()
-            total_conversations = session.query(Conversation).count()
-            total_audio = session.query(Conversation).filter(Conversation.audio_generated == True).count()
-            
-            session.close()
+            with self.get_session() as session:
+                # One conditional-aggregate scan per table instead of two COUNTs each
+                total_users, active_users = session.query(
+                    func.count(User.id),
+                    func.coalesce(func.sum(case((User.is_active == True, 1), else_=0)), 0)
+                ).one()
+                total_conversations, total_audio = session.query(
+                    func.count(Conversation.id),
+                    func.coalesce(func.sum(case((Conversation.audio_generated == True, 1), else_=0)), 0)
+                ).one()
             
             return {
                 'total_users': total_users,
@@ -230,8 +342,6 @@ class DatabaseManager:
             
         except SQLAlchemyError as e:
             logger.error(f"Database error getting user stats: {e}")
-            if 'session' in locals():
-                session.close()
             return {
                 'total_users': 0,
                 'active_users': 0,
@@ -239,5 +349,47 @@ class DatabaseManager:
                 'total_audio_messages': 0
             }
 
+    def get_wiki_cache(self, query: str, max_age_seconds: float) -> Optional[Tuple[str, datetime]]:
+        """Get a stored (summary, fetched_at) if it is newer than max_age_seconds"""
+        try:
+            with self.get_session() as session:
+                row = session.execute(
+                    select(WikiCache.summary, WikiCache.fetched_at)
+                    .where(WikiCache.query == query)
+                ).first()
+            
+            if row and (datetime.utcnow() - row.fetched_at).total_seconds() < max_age_seconds:
+                return row.summary, row.fetched_at
+            return None
+            
+        except SQLAlchemyError as e:
+            logger.error(f"Database error reading wiki cache: {e}")
+            return None
+    
+    def save_wiki_cache(self, query: str, summary: str) -> bool:
+        """Store (or refresh) a Wikipedia summary for a normalized query"""
+        try:
+            stmt = sqlite_insert(WikiCache).values(
+                query=query,
+                summary=summary,
+                fetched_at=datetime.utcnow()
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[WikiCache.query],
+                set_={
+                    'summary': stmt.excluded.summary,
+                    'fetched_at': stmt.excluded.fetched_at
+                }
+            )
+            
+            with self.get_session() as session:
+                session.execute(stmt)
+                session.commit()
+            return True
+            
+        except SQLAlchemyError as e:
+            logger.error(f"Database error saving wiki cache: {e}")
+            return False
+
 # Global database manager instance
 db_manager = DatabaseManager()
\ No newline at end of file
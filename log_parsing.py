@@ -0,0 +1,47 @@
+from collections import namedtuple
+from datetime import datetime
+from sys import intern
+
+# Kept free of Streamlit and other side effects so dashboard worker processes
+# can import it on their own
+
+LOG_TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S,%f'
+
+LOG_COLUMNS = ['timestamp', 'logger', 'level', 'message']
+LogEntry = namedtuple('LogEntry', LOG_COLUMNS)
+
+def _fast_ts(timestamp_str):
+    """Parse a fixed-width 'YYYY-MM-DD HH:MM:SS,mmm' logging timestamp"""
+    s = timestamp_str
+    if len(s) != 23:
+        return datetime.strptime(s, LOG_TIMESTAMP_FORMAT)
+    try:
+        return datetime(int(s[0:4]), int(s[5:7]), int(s[8:10]),
+                        int(s[11:13]), int(s[14:16]), int(s[17:19]),
+                        int(s[20:23]) * 1000)
+    except ValueError:
+        return datetime.strptime(timestamp_str, LOG_TIMESTAMP_FORMAT)
+
+def parse_log_entry(log_line):
+    """Parse a log entry to extract information"""
+    try:
+        parts = log_line.split(' - ', 3)
+        if len(parts) >= 4:
+            timestamp_str = parts[0]
+            logger_name = parts[1]
+            level = parts[2]
+            message = parts[3]
+            
+            # Parse timestamp
+            timestamp = _fast_ts(timestamp_str)
+            
+            # Logger names and levels repeat on every line; share one string each
+            return LogEntry(timestamp, intern(logger_name), intern(level), message)
+    except Exception:
+        pass
+    
+    return None
+
+def parse_chunk(lines):
+    """Parse one chunk of log lines (run in a worker process by full scans)"""
+    return [entry for entry in map(parse_log_entry, lines) if entry]
@@ -1,33 +1,44 @@
+import atexit
+import functools
+import hashlib
+import io
 import os
 import logging
-import tempfile
+import queue
+import threading
 import time
 import re
+from collections import OrderedDict, deque
+from logging.handlers import QueueHandler, QueueListener
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 import telebot
 from google import genai
 from google.genai import types
-from gtts import gTTS
 from dotenv import load_dotenv
 from database import db_manager
-import wikipediaapi
-import requests
-from bs4 import BeautifulSoup
 
 # Load environment variables
 load_dotenv()
 
-# Configure logging
+# Configure logging. Handlers only enqueue formatted records; a listener thread
+# does the actual file/console writes so logging never blocks message handlers.
+log_queue = queue.Queue(-1)
+log_listener = QueueListener(
+    log_queue,
+    logging.FileHandler('bot.log', delay=True),
+    logging.StreamHandler()
+)
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('bot.log'),
-        logging.StreamHandler()
-    ]
+    handlers=[QueueHandler(log_queue)]
 )
+log_listener.start()
+atexit.register(log_listener.stop)
 logger = logging.getLogger(__name__)
 
 # Initialize APIs
@@ -38,22 +49,74 @@ if not TELEGRAM_API_KEY or not GEMINI_API_KEY:
     logger.error("Missing API keys. Please check your .env file.")
     exit(1)
 
+# Handler worker threads: Gemini, gTTS and Telegram uploads are all blocking
+# network I/O, so several messages are processed concurrently
+BOT_WORKER_THREADS = int(os.getenv('BOT_WORKER_THREADS', '16'))
+
 # Initialize clients
-bot = telebot.TeleBot(TELEGRAM_API_KEY)
-gemini_client = genai.Client(api_key=GEMINI_API_KEY)
-
-# Initialize Wikipedia client with Malayalam support
-wiki_wiki_ml = wikipediaapi.Wikipedia(
-    language='ml',
-    extract_format=wikipediaapi.ExtractFormat.WIKI,
-    user_agent='MaveliBot/1.0 (https://replit.com)'
-)
-wiki_wiki_en = wikipediaapi.Wikipedia(
-    language='en', 
-    extract_format=wikipediaapi.ExtractFormat.WIKI,
-    user_agent='MaveliBot/1.0 (https://replit.com)'
+bot = telebot.TeleBot(TELEGRAM_API_KEY, threaded=True, num_threads=BOT_WORKER_THREADS)
+# The SDK talks REST over one pooled HTTP client shared by all handler threads
+# (there is no gRPC transport); bound each call so a stalled request can't pin
+# a worker
+GEMINI_TIMEOUT_MS = 30_000
+gemini_client = genai.Client(
+    api_key=GEMINI_API_KEY,
+    http_options=types.HttpOptions(timeout=GEMINI_TIMEOUT_MS)
 )
 
+GEMINI_MODEL = "gemini-1.5-flash"
+
+# Shared pool for side calls (DB, chat actions) that overlap the Gemini request
+io_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="maveli-io")
+
+def _log_background_error(future):
+    """Done-callback that reports exceptions from fire-and-forget tasks"""
+    if not future.cancelled() and future.exception() is not None:
+        logger.warning(f"Background task failed: {future.exception()}")
+
+def run_in_background(fn, *args):
+    """Fire-and-forget a call on the I/O pool, logging any failure"""
+    future = io_executor.submit(fn, *args)
+    future.add_done_callback(_log_background_error)
+    return future
+
+WIKI_USER_AGENT = 'MaveliBot/1.0 (https://replit.com)'
+WIKI_MAX_RETRIES = 3
+WIKI_RETRY_WAIT = 0.3  # seconds, doubled on each retry
+
+# Wikipedia (only needed for trigger words) and gTTS (only once a reply is ready)
+# are imported on first use, keeping them out of the bot's startup import graph
+@functools.cache
+def get_wikipedia_client(language: str):
+    """Create (once per language) a Wikipedia client whose keep-alive pool fits all handler threads"""
+    import httpx
+    import wikipediaapi
+    
+    # wikipediaapi keeps one httpx.Client per Wikipedia instance; size its
+    # keep-alive pool so concurrent handlers reuse connections instead of each
+    # paying a fresh TCP + TLS handshake. Limits go on the transport because
+    # httpx ignores the client-level limits when a transport is supplied.
+    # Transient failures are retried by wikipediaapi itself with exponential
+    # backoff (honouring Retry-After on 429s).
+    transport = httpx.HTTPTransport(limits=httpx.Limits(
+        max_connections=max(32, BOT_WORKER_THREADS),
+        max_keepalive_connections=BOT_WORKER_THREADS
+    ))
+    return wikipediaapi.Wikipedia(
+        language=language,
+        extract_format=wikipediaapi.ExtractFormat.WIKI,
+        user_agent=WIKI_USER_AGENT,
+        max_retries=WIKI_MAX_RETRIES,
+        retry_wait=WIKI_RETRY_WAIT,
+        transport=transport
+    )
+
+@functools.cache
+def _gtts_class():
+    """Import gTTS on first use"""
+    from gtts import gTTS
+    return gTTS
+
 # Bot statistics for monitoring
 bot_stats = {
     'total_messages': 0,
@@ -62,8 +125,10 @@ bot_stats = {
     'audio_generations': 0,
     'start_time': datetime.now(),
     'last_activity': None,
-    'recent_messages': []  # Store recent user messages for dashboard
+    'recent_messages': deque(maxlen=50)  # Last 50 user messages for dashboard
 }
+# Handlers run on several worker threads, so guard bot_stats updates
+bot_stats_lock = threading.Lock()
 
 # Maveli's personality prompt - updated to handle multiple languages
 MAVELI_SYSTEM_PROMPT = """
@@ -117,62 +182,337 @@ MAVELI_SYSTEM_PROMPT = """
 10. എപ്പോഴും ഓണാശംസകൾ നൽകുക, രാജകീയ അന്തസ്സോടെ
 """
 
+# Varied fallback Malayalam responses with royal knowledge and singing hints,
+# used when Gemini fails; built once as a tuple
+FALLBACK_RESPONSES = (
+    "ഹലോ എന്റെ പ്രിയ പ്രജകളേ! എന്താണ് അറിയാൻ ഉള്ളത്? രാജാവിന്റെ പക്കൽ എല്ലാ അറിവും ഉണ്ട്! 👑🔥",
+    "ദാ ബ്രോ! എന്തേലും ചോദിക്കാനുണ്ടോ? പാട്ടോ, കഥയോ, അറിവോ - എല്ലാം തരാം! 🎵😎",
+    "മോനേ, മാവേലി രാജാവ് ഇവിടെ! പാട്ട് വേണോ? കഥ വേണോ? എന്തും ചോദിക്കൂ! ⚡👑",
+    "പൊളിച്ചു! എന്റെ കിംഗ്ഡത്തിലെ എല്ലാ അറിവും നിനക്ക് തരാം, പാട്ടും പാടാം! 🎭🔥",
+    "കിടിലൻ വൈബ്സ്! രാജാവിന്റെ പക്കൽ എല്ലാ ജ്ഞാനവും ഉണ്ട് - ചോദിച്ചോളൂ! 💫👑",
+    "മാസ്സ് എൻട്രി! മാവേലി രാജാവ് റെഡി - പാട്ടും പാടാം, കഥയും പറയാം! 🚀🎵",
+    "ലിറ്റ് വൈബ്സ്! എന്തെങ്കിലും അറിയാനുണ്ടോ? ഓണപ്പാട്ടും പാടാം! 🌟🎭",
+    "ഫയർ എനർജി! രാജാവിന്റെ കിംഗ്ഡത്തിൽ എന്തും ചോദിക്കാം! 💪🔥",
+    "സൂപ്പർ കിംഗ് മാവേലി ഹിയർ! ഗാനം, കഥ, അറിവ് - എല്ലാം റെഡി! 🎯👑",
+    "അടിപൊളി എൻട്രി! രാജകീയ സേവനത്തിൽ എന്തും ചോദിക്കൂ ബ്രോ! 🎵⚡"
+)
+
+# MAVELI_SYSTEM_PROMPT is stored once as Gemini cached content and referenced
+# by name, so each request only sends the per-message part of the prompt
+SYSTEM_PROMPT_CACHE_TTL = 3600  # seconds
+SYSTEM_PROMPT_CACHE_REFRESH_MARGIN = 300  # recreate this long before expiry
+SYSTEM_PROMPT_CACHE_RETRY = 600  # seconds to wait after a failed create
+_system_prompt_cache = {'name': None, 'expires_at': 0.0, 'refresh_at': 0.0, 'refreshing': False}
+_system_prompt_cache_lock = threading.Lock()
+
+def refresh_system_prompt_cache():
+    """(Re)create the Gemini cached content holding MAVELI_SYSTEM_PROMPT"""
+    try:
+        cache = gemini_client.caches.create(
+            model=GEMINI_MODEL,
+            config=types.CreateCachedContentConfig(
+                system_instruction=MAVELI_SYSTEM_PROMPT,
+                ttl=f"{SYSTEM_PROMPT_CACHE_TTL}s"
+            )
+        )
+    except Exception as e:
+        # e.g. prompt below the model's minimum cacheable size; send it inline
+        logger.warning(f"Gemini prompt caching unavailable, sending prompt inline: {e}")
+        with _system_prompt_cache_lock:
+            _system_prompt_cache['refresh_at'] = time.monotonic() + SYSTEM_PROMPT_CACHE_RETRY
+            _system_prompt_cache['refreshing'] = False
+        return
+    
+    now = time.monotonic()
+    with _system_prompt_cache_lock:
+        _system_prompt_cache['name'] = cache.name
+        _system_prompt_cache['expires_at'] = now + SYSTEM_PROMPT_CACHE_TTL - 30
+        _system_prompt_cache['refresh_at'] = now + SYSTEM_PROMPT_CACHE_TTL - SYSTEM_PROMPT_CACHE_REFRESH_MARGIN
+        _system_prompt_cache['refreshing'] = False
+    logger.info(f"Created Gemini system prompt cache: {cache.name}")
+
+def get_system_prompt_cache() -> Optional[str]:
+    """Return the cached-content name for the system prompt, or None if caching is unavailable"""
+    now = time.monotonic()
+    with _system_prompt_cache_lock:
+        name = _system_prompt_cache['name'] if now < _system_prompt_cache['expires_at'] else None
+        needs_refresh = now >= _system_prompt_cache['refresh_at'] and not _system_prompt_cache['refreshing']
+        if needs_refresh:
+            _system_prompt_cache['refreshing'] = True
+    
+    # Recreate in the background; requests keep using the current cache (or the
+    # inline prompt) meanwhile instead of waiting on caches.create
+    if needs_refresh:
+        run_in_background(refresh_system_prompt_cache)
+    return name
+
+# Emoji/whitespace patterns used by clean_text_for_tts, compiled once at import
+_EMOJI_RE = re.compile(
+    "["
+    "\U0001F600-\U0001F64F"  # emoticons
+    "\U0001F300-\U0001F5FF"  # symbols & pictographs
+    "\U0001F680-\U0001F6FF"  # transport & map symbols
+    "\U0001F1E0-\U0001F1FF"  # flags (iOS)
+    "\U00002500-\U00002BEF"  # chinese char
+    "\U00002702-\U000027B0"
+    "\U000024C2-\U0001F251"
+    "\U0001f926-\U0001f937"
+    "\U00010000-\U0010ffff"
+    "\u2640-\u2642"
+    "\u2600-\u2B55"
+    "\u200d"
+    "\u23cf"
+    "\u23e9"
+    "\u231a"
+    "\ufe0f"  # dingbats
+    "\u3030"
+    "]+", flags=re.UNICODE)
+_WS_RE = re.compile(r'\s+')
+# Sentence boundaries used to split replies into independently fetched TTS chunks
+_SENTENCE_END_RE = re.compile(r'(?<=[.!?।])\s+')
+
+# Messages containing any of these words trigger a Wikipedia lookup; matched as
+# one compiled alternation so a message is scanned once
+WIKI_TRIGGER_WORDS = ('എന്താണ്', 'what', 'കേരളം', 'kerala', 'ഇന്ത്യ', 'india', 'ചരിത്രം', 'history')
+_WIKI_TRIGGER_RE = re.compile("|".join(map(re.escape, WIKI_TRIGGER_WORDS)), re.IGNORECASE)
+
+# Wikipedia lookups are cached per normalized query: an in-process LRU in front
+# of the wiki_cache table, so warm entries also survive restarts
+WIKI_CACHE_SIZE = 4096
+WIKI_CACHE_TTL = 24 * 3600  # seconds
+_wiki_cache: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (fetched_at, knowledge)
+_wiki_cache_lock = threading.Lock()
+
+def _fetch_wikipedia_knowledge(query: str) -> str:
+    """Query Wikipedia (Malayalam, then English, then search) for a topic"""
+    # Try Malayalam Wikipedia first
+    ml_page = get_wikipedia_client('ml').page(query)
+    if ml_page.exists():
+        summary = ml_page.summary[:500]  # First 500 characters
+        return f"വിക്കിപീഡിയയിൽ നിന്ന്: {summary}..."
+    
+    # Try English Wikipedia and translate context
+    en_page = get_wikipedia_client('en').page(query)
+    if en_page.exists():
+        summary = en_page.summary[:300]  # Shorter for English
+        return f"അറിവ്: {summary}... (ഇംഗ്ലീഷിൽ നിന്ന് വിവർത്തനം)"
+    
+    # Search for similar topics
+    search_results = get_wikipedia_client('en').search(query, results=3)
+    if search_results:
+        return f"ബന്ധപ്പെട്ട വിഷയങ്ങൾ: {', '.join(search_results[:3])}"
+    
+    return ""
+
 def search_wikipedia_knowledge(query: str) -> str:
     """Search Wikipedia for relevant information"""
+    key = query.lower().strip()
+    now = time.monotonic()
+    with _wiki_cache_lock:
+        cached = _wiki_cache.get(key)
+        if cached and now - cached[0] < WIKI_CACHE_TTL:
+            _wiki_cache.move_to_end(key)
+            return cached[1]
+    
+    stored = db_manager.get_wiki_cache(key, WIKI_CACHE_TTL)
+    if stored:
+        # Back-date the memory entry so it expires with the stored row
+        knowledge, fetched_at = stored
+        fetched = now - (datetime.utcnow() - fetched_at).total_seconds()
+    else:
+        try:
+            knowledge = _fetch_wikipedia_knowledge(query)
+        except Exception as e:
+            logger.error(f"Wikipedia search error: {e}")
+            return ""  # Errors are not cached so the next message retries
+        db_manager.save_wiki_cache(key, knowledge)
+        fetched = now
+    
+    with _wiki_cache_lock:
+        _wiki_cache[key] = (fetched, knowledge)
+        _wiki_cache.move_to_end(key)
+        while len(_wiki_cache) > WIKI_CACHE_SIZE:
+            _wiki_cache.popitem(last=False)
+    return knowledge
+
+# Replies to exact repeat messages ("hi", "ഓണാശംസകൾ", ...) are served from an
+# in-process LRU of (reply, mp3) so Gemini and gTTS are skipped entirely
+RESPONSE_CACHE_SIZE = 2000
+RESPONSE_CACHE_TTL = 24 * 3600  # seconds
+_response_cache: "OrderedDict[bytes, tuple]" = OrderedDict()  # key -> (cached_at, reply, mp3 bytes or None)
+_response_cache_lock = threading.Lock()
+
+def _response_cache_key(user_message: str, context: str) -> bytes:
+    # Lowercased, emoji-stripped, whitespace-collapsed message plus a digest of
+    # the conversation context the reply was written for, so a reply built on
+    # one user's history is never served to another
+    normalized = clean_text_for_tts(user_message).lower()
+    return (hashlib.blake2b(normalized.encode('utf-8'), digest_size=16).digest()
+            + hashlib.blake2b(context.encode('utf-8'), digest_size=16).digest())
+
+def get_cached_response(user_message: str, context: str) -> Optional[Tuple[str, Optional[bytes]]]:
+    """Return (reply, mp3 bytes or None) for a recently answered identical message and context"""
+    key = _response_cache_key(user_message, context)
+    with _response_cache_lock:
+        cached = _response_cache.get(key)
+        if cached is None:
+            return None
+        if time.monotonic() - cached[0] >= RESPONSE_CACHE_TTL:
+            del _response_cache[key]
+            return None
+        _response_cache.move_to_end(key)
+        return cached[1], cached[2]
+
+def cache_response(user_message: str, context: str, response: str, audio: Optional[bytes] = None):
+    """Remember a Gemini reply (and optionally its audio) for identical messages and context"""
+    key = _response_cache_key(user_message, context)
+    with _response_cache_lock:
+        cached = _response_cache.get(key)
+        if audio is not None and cached is not None and cached[1] == response:
+            # Attach audio to the reply cached by generate_maveli_response
+            _response_cache[key] = (cached[0], response, audio)
+        elif audio is None:
+            _response_cache[key] = (time.monotonic(), response, None)
+        else:
+            return  # audio for a reply that isn't cached (e.g. a fallback)
+        _response_cache.move_to_end(key)
+        while len(_response_cache) > RESPONSE_CACHE_SIZE:
+            _response_cache.popitem(last=False)
+
+# Second tier: near-duplicate messages ("hello maveli" / "hello maveli!!") are
+# matched by embedding cosine similarity against recent Gemini replies. Only
+# replies generated without conversation context or Wikipedia text are shared.
+EMBEDDING_MODEL = os.getenv('GEMINI_EMBEDDING_MODEL', 'gemini-embedding-001')
+EMBEDDING_DIMENSIONS = 768
+# The tier switches itself off for a while after repeated embedding failures
+# (e.g. an unavailable model) so messages don't each pay a failed round-trip
+EMBEDDING_MAX_FAILURES = 3
+EMBEDDING_RETRY_AFTER = 600  # seconds
+SEMANTIC_CACHE_SIZE = 1024
+SEMANTIC_CACHE_THRESHOLD = 0.92
+# vectors: (SEMANTIC_CACHE_SIZE, dim) float32 unit rows used as a ring buffer
+_semantic_cache = {'vectors': None, 'responses': [None] * SEMANTIC_CACHE_SIZE, 'count': 0, 'next': 0}
+_semantic_cache_lock = threading.Lock()
+_embedding_state = {'failures': 0, 'disabled_until': 0.0}
+
+def _embed_message(text: str) -> Optional[np.ndarray]:
+    """Return the unit-length Gemini embedding of text, or None on failure"""
+    if time.monotonic() < _embedding_state['disabled_until']:
+        return None
     try:
-        # Try Malayalam Wikipedia first
-        ml_page = wiki_wiki_ml.page(query)
-        if ml_page.exists():
-            summary = ml_page.summary[:500]  # First 500 characters
-            return f"വിക്കിപീഡിയയിൽ നിന്ന്: {summary}..."
-        
-        # Try English Wikipedia and translate context
-        en_page = wiki_wiki_en.page(query)
-        if en_page.exists():
-            summary = en_page.summary[:300]  # Shorter for English
-            return f"അറിവ്: {summary}... (ഇംഗ്ലീഷിൽ നിന്ന് വിവർത്തനം)"
-        
-        # Search for similar topics
-        search_results = wiki_wiki_en.search(query, results=3)
-        if search_results:
-            return f"ബന്ധപ്പെട്ട വിഷയങ്ങൾ: {', '.join(search_results[:3])}"
-        
-        return ""
+        result = gemini_client.models.embed_content(
+            model=EMBEDDING_MODEL,
+            contents=text,
+            config=types.EmbedContentConfig(output_dimensionality=EMBEDDING_DIMENSIONS)
+        )
+        vector = np.asarray(result.embeddings[0].values, dtype=np.float32)
     except Exception as e:
-        logger.error(f"Wikipedia search error: {e}")
-        return ""
+        with _semantic_cache_lock:
+            _embedding_state['failures'] += 1
+            if _embedding_state['failures'] >= EMBEDDING_MAX_FAILURES:
+                _embedding_state['failures'] = 0
+                _embedding_state['disabled_until'] = time.monotonic() + EMBEDDING_RETRY_AFTER
+                logger.warning(f"Embedding request failed ({e}); disabling semantic cache for {EMBEDDING_RETRY_AFTER}s")
+            else:
+                logger.warning(f"Embedding request failed: {e}")
+        return None
+    with _semantic_cache_lock:
+        _embedding_state['failures'] = 0
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else None
+
+def find_similar_response(user_message: str) -> Tuple[Optional[str], Optional[np.ndarray]]:
+    """Return (cached reply or None, message embedding or None)"""
+    vector = _embed_message(clean_text_for_tts(user_message) or user_message)
+    if vector is None:
+        return None, None
+    with _semantic_cache_lock:
+        count = _semantic_cache['count']
+        vectors = _semantic_cache['vectors']
+        if count and vectors.shape[1] == vector.shape[0]:
+            similarities = vectors[:count] @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] >= SEMANTIC_CACHE_THRESHOLD:
+                return _semantic_cache['responses'][best], vector
+    return None, vector
+
+def remember_similar_response(vector: Optional[np.ndarray], response: str):
+    """Store a Gemini reply under its message embedding"""
+    if vector is None:
+        return
+    with _semantic_cache_lock:
+        if _semantic_cache['vectors'] is None:
+            _semantic_cache['vectors'] = np.zeros((SEMANTIC_CACHE_SIZE, vector.shape[0]), dtype=np.float32)
+        elif _semantic_cache['vectors'].shape[1] != vector.shape[0]:
+            return
+        slot = _semantic_cache['next']
+        _semantic_cache['vectors'][slot] = vector
+        _semantic_cache['responses'][slot] = response
+        _semantic_cache['next'] = (slot + 1) % SEMANTIC_CACHE_SIZE
+        _semantic_cache['count'] = min(_semantic_cache['count'] + 1, SEMANTIC_CACHE_SIZE)
+
+# Prompt templates built once; the system prompt is only inlined when it isn't
+# held in a Gemini cache
+_PROMPT_BODY_TMPL = """
+{context}
+{wiki}
+ഉപയോക്താവിന്റെ പുതിയ സന്ദേശം: {msg}
+
+മാവേലി രാജാവായി മലയാളത്തിൽ മാത്രം മറുപടി നൽകുക. വിക്കിപീഡിയയിൽ നിന്നുള്ള അറിവ് ഉണ്ടെങ്കിൽ അത് ഉപയോഗിച്ച് വിശദമായ ഉത്തരം നൽകുക:
+"""
+_SHORT_PROMPT_BODY_TMPL = """
+
+User: {msg}
 
-def generate_maveli_response(user_message: str, user_id: int) -> str:
+Reply in Malayalam only (2-3 sentences max):
+"""
+_ESCAPED_SYSTEM_PROMPT = MAVELI_SYSTEM_PROMPT.replace('{', '{{').replace('}', '}}')
+_PROMPT_TMPL = _ESCAPED_SYSTEM_PROMPT + _PROMPT_BODY_TMPL
+_PROMPT_TMPL_CACHED = _PROMPT_BODY_TMPL
+_SHORT_PROMPT_TMPL = _ESCAPED_SYSTEM_PROMPT + _SHORT_PROMPT_BODY_TMPL
+_SHORT_PROMPT_TMPL_CACHED = _SHORT_PROMPT_BODY_TMPL
+
+def generate_maveli_response(user_message: str, user_id: int, context: Optional[str] = None) -> str:
     """Generate Malayalam response using Gemini AI with conversation context"""
     try:
-        # Get conversation context from database (with error handling for DB issues)
-        context = ""
-        try:
-            context = db_manager.get_conversation_context(user_id, limit=3)
-        except Exception as db_error:
-            logger.warning(f"Database context retrieval failed: {db_error}")
-            context = ""
+        # Get conversation context from database unless the caller prefetched it
+        if context is None:
+            try:
+                context = db_manager.get_conversation_context(user_id, limit=3)
+            except Exception as db_error:
+                logger.warning(f"Database context retrieval failed: {db_error}")
+                context = ""
+        
+        # Reuse the reply to a near-identical earlier message if there is one.
+        # Only replies that depend on nothing but the message are shared: no
+        # conversation history and no Wikipedia text picked for the message.
+        wiki_triggered = _WIKI_TRIGGER_RE.search(user_message) is not None
+        message_vector = None
+        if not context and not wiki_triggered:
+            similar_response, message_vector = find_similar_response(user_message)
+            if similar_response:
+                logger.info("Serving semantically cached response")
+                cache_response(user_message, context, similar_response)
+                return similar_response
         
         # Search for Wikipedia knowledge if user is asking for information
         wiki_knowledge = ""
-        if any(word in user_message.lower() for word in ['എന്താണ്', 'what', 'കേരളം', 'kerala', 'ഇന്ത്യ', 'india', 'ചരിത്രം', 'history']):
+        if wiki_triggered:
             wiki_knowledge = search_wikipedia_knowledge(user_message)
             if wiki_knowledge:
                 wiki_knowledge = f"\n\nഅധിക അറിവ്:\n{wiki_knowledge}"
         
-        prompt = f"""
-        {MAVELI_SYSTEM_PROMPT}
-        {context}
-        {wiki_knowledge}
-        ഉപയോക്താവിന്റെ പുതിയ സന്ദേശം: {user_message}
+        # The system prompt is only inlined when it isn't held in a Gemini cache
+        cached_prompt = get_system_prompt_cache()
         
-        മാവേലി രാജാവായി മലയാളത്തിൽ മാത്രം മറുപടി നൽകുക. വിക്കിപീഡിയയിൽ നിന്നുള്ള അറിവ് ഉണ്ടെങ്കിൽ അത് ഉപയോഗിച്ച് വിശദമായ ഉത്തരം നൽകുക:
-        """
+        prompt_template = _PROMPT_TMPL_CACHED if cached_prompt else _PROMPT_TMPL
+        prompt = prompt_template.format_map({'context': context, 'wiki': wiki_knowledge, 'msg': user_message})
         
         response = gemini_client.models.generate_content(
-            model="gemini-1.5-flash",
+            model=GEMINI_MODEL,
             contents=prompt,
             config=types.GenerateContentConfig(
+                cached_content=cached_prompt,
                 temperature=0.7,
                 max_output_tokens=150,  # Reduced for shorter responses
                 top_p=0.9,
@@ -186,18 +526,14 @@ def generate_maveli_response(user_message: str, user_id: int) -> str:
             if hasattr(candidate, 'finish_reason') and str(candidate.finish_reason) == 'FinishReason.MAX_TOKENS':
                 logger.warning("Gemini response was truncated due to MAX_TOKENS limit")
                 # Try with a shorter, more direct prompt
-                shorter_prompt = f"""
-                {MAVELI_SYSTEM_PROMPT}
-                
-                User: {user_message}
-                
-                Reply in Malayalam only (2-3 sentences max):
-                """
+                short_template = _SHORT_PROMPT_TMPL_CACHED if cached_prompt else _SHORT_PROMPT_TMPL
+                shorter_prompt = short_template.format_map({'msg': user_message})
                 
                 response = gemini_client.models.generate_content(
-                    model="gemini-1.5-flash",
+                    model=GEMINI_MODEL,
                     contents=shorter_prompt,
                     config=types.GenerateContentConfig(
+                        cached_content=cached_prompt,
                         temperature=0.7,
                         max_output_tokens=100,  # Even shorter
                         top_p=0.9,
@@ -223,6 +559,8 @@ def generate_maveli_response(user_message: str, user_id: int) -> str:
         
         if malayalam_response and len(malayalam_response.strip()) > 0:
             logger.info(f"Successfully generated Gemini response: {malayalam_response[:100]}...")
+            cache_response(user_message, context, malayalam_response)
+            remember_similar_response(message_vector, malayalam_response)
             return malayalam_response
         else:
             logger.warning(f"Gemini returned empty response after retries. Using fallback.")
@@ -230,58 +568,83 @@ def generate_maveli_response(user_message: str, user_id: int) -> str:
             
     except Exception as e:
         logger.error(f"Error generating Gemini response: {e}")
-        # More varied fallback Malayalam responses with royal knowledge and singing hints
-        fallback_responses = [
-            f"ഹലോ എന്റെ പ്രിയ പ്രജകളേ! എന്താണ് അറിയാൻ ഉള്ളത്? രാജാവിന്റെ പക്കൽ എല്ലാ അറിവും ഉണ്ട്! 👑🔥",
-            f"ദാ ബ്രോ! എന്തേലും ചോദിക്കാനുണ്ടോ? പാട്ടോ, കഥയോ, അറിവോ - എല്ലാം തരാം! 🎵😎",
-            f"മോനേ, മാവേലി രാജാവ് ഇവിടെ! പാട്ട് വേണോ? കഥ വേണോ? എന്തും ചോദിക്കൂ! ⚡👑",
-            f"പൊളിച്ചു! എന്റെ കിംഗ്ഡത്തിലെ എല്ലാ അറിവും നിനക്ക് തരാം, പാട്ടും പാടാം! 🎭🔥",
-            f"കിടിലൻ വൈബ്സ്! രാജാവിന്റെ പക്കൽ എല്ലാ ജ്ഞാനവും ഉണ്ട് - ചോദിച്ചോളൂ! 💫👑",
-            f"മാസ്സ് എൻട്രി! മാവേലി രാജാവ് റെഡി - പാട്ടും പാടാം, കഥയും പറയാം! 🚀🎵",
-            f"ലിറ്റ് വൈബ്സ്! എന്തെങ്കിലും അറിയാനുണ്ടോ? ഓണപ്പാട്ടും പാടാം! 🌟🎭",
-            f"ഫയർ എനർജി! രാജാവിന്റെ കിംഗ്ഡത്തിൽ എന്തും ചോദിക്കാം! 💪🔥",
-            f"സൂപ്പർ കിംഗ് മാവേലി ഹിയർ! ഗാനം, കഥ, അറിവ് - എല്ലാം റെഡി! 🎯👑",
-            f"അടിപൊളി എൻട്രി! രാജകീയ സേവനത്തിൽ എന്തും ചോദിക്കൂ ബ്രോ! 🎵⚡"
-        ]
-        # Use hash of user_message for more variety instead of time
-        response_index = hash(user_message + str(user_id)) % len(fallback_responses)
-        return fallback_responses[response_index]
+        # Mix user, message length and the current minute for variety without
+        # building and hashing a new string on the error path
+        response_index = (user_id ^ len(user_message) ^ int(time.time() // 60)) % len(FALLBACK_RESPONSES)
+        return FALLBACK_RESPONSES[response_index]
 
-def clean_text_for_tts(text: str) -> str:
-    """Remove emojis and clean text for better TTS output"""
-    # Remove emojis using regex
-    emoji_pattern = re.compile(
-        "["
-        "\U0001F600-\U0001F64F"  # emoticons
-        "\U0001F300-\U0001F5FF"  # symbols & pictographs
-        "\U0001F680-\U0001F6FF"  # transport & map symbols
-        "\U0001F1E0-\U0001F1FF"  # flags (iOS)
-        "\U00002500-\U00002BEF"  # chinese char
-        "\U00002702-\U000027B0"
-        "\U00002702-\U000027B0"
-        "\U000024C2-\U0001F251"
-        "\U0001f926-\U0001f937"
-        "\U00010000-\U0010ffff"
-        "\u2640-\u2642"
-        "\u2600-\u2B55"
-        "\u200d"
-        "\u23cf"
-        "\u23e9"
-        "\u231a"
-        "\ufe0f"  # dingbats
-        "\u3030"
-        "]+", flags=re.UNICODE)
-    
-    # Remove emojis
-    clean_text = emoji_pattern.sub(r'', text)
+# Identical messages arriving while a reply is still being generated wait for
+# that reply instead of issuing their own Gemini request (singleflight)
+_inflight_responses: Dict[bytes, Future] = {}
+_inflight_responses_lock = threading.Lock()
+
+def generate_maveli_response_once(user_message: str, user_id: int, context: Optional[str] = None) -> str:
+    """generate_maveli_response, sharing one call among concurrent identical messages"""
+    if context is None:
+        try:
+            context = db_manager.get_conversation_context(user_id, limit=3)
+        except Exception as db_error:
+            logger.warning(f"Database context retrieval failed: {db_error}")
+            context = ""
+    # Only callers with the same conversation context share a reply
+    key = _response_cache_key(user_message, context)
+    with _inflight_responses_lock:
+        pending = _inflight_responses.get(key)
+        is_leader = pending is None
+        if is_leader:
+            pending = Future()
+            _inflight_responses[key] = pending
     
-    # Clean up extra spaces
-    clean_text = re.sub(r'\s+', ' ', clean_text).strip()
+    if not is_leader:
+        logger.info(f"Waiting on in-flight response for identical message from user {user_id}")
+        return pending.result()
     
-    return clean_text
+    try:
+        response = generate_maveli_response(user_message, user_id, context=context)
+        pending.set_result(response)
+        return response
+    except BaseException as e:
+        pending.set_exception(e)
+        raise
+    finally:
+        with _inflight_responses_lock:
+            _inflight_responses.pop(key, None)
+
+def clean_text_for_tts(text: str) -> str:
+    """Remove emojis and clean text for better TTS output"""
+    # Remove emojis, then clean up extra spaces
+    return _WS_RE.sub(' ', _EMOJI_RE.sub('', text)).strip()
+
+# Long replies are synthesized as several sentence chunks fetched in parallel;
+# MP3 frames concatenate cleanly, so the chunk outputs are simply joined
+TTS_CHUNK_CHARS = 120
+tts_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="maveli-tts")
+
+def split_tts_chunks(text: str) -> List[str]:
+    """Group sentences into chunks of at most TTS_CHUNK_CHARS (longer sentences stay whole)"""
+    chunks = []
+    current = ""
+    for sentence in _SENTENCE_END_RE.split(text):
+        if current and len(current) + 1 + len(sentence) > TTS_CHUNK_CHARS:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        chunks.append(current)
+    return chunks
+
+def _synthesize_chunk(text: str) -> bytes:
+    """Fetch the MP3 bytes for one chunk of text"""
+    # Generate TTS with Malayalam - use slower speed for deeper, more masculine voice
+    # Note: Google TTS doesn't have gender selection for Malayalam, but slow=True makes it sound deeper
+    chunk_buffer = io.BytesIO()
+    tts_class = _gtts_class()
+    tts_class(text=text, lang='ml', slow=True, tld='com.au').write_to_fp(chunk_buffer)
+    return chunk_buffer.getvalue()
 
-def text_to_speech_malayalam(text: str) -> Optional[str]:
-    """Convert Malayalam text to speech and return audio file path"""
+def text_to_speech_malayalam(text: str) -> Optional[io.BytesIO]:
+    """Convert Malayalam text to speech and return an in-memory MP3 buffer"""
     try:
         # Clean text by removing emojis for better TTS
         clean_text = clean_text_for_tts(text)
@@ -290,36 +653,28 @@ def text_to_speech_malayalam(text: str) -> Optional[str]:
             logger.warning("Text became empty after emoji removal")
             return None
         
-        # Create temporary file for audio
-        temp_audio = tempfile.NamedTemporaryFile(suffix='.mp3', delete=False)
-        temp_audio.close()
+        chunks = split_tts_chunks(clean_text)
+        if len(chunks) == 1:
+            audio_parts = [_synthesize_chunk(chunks[0])]
+        else:
+            audio_parts = list(tts_executor.map(_synthesize_chunk, chunks))
         
-        # Generate TTS with Malayalam - use slower speed for deeper, more masculine voice
-        # Note: Google TTS doesn't have gender selection for Malayalam, but slow=True makes it sound deeper
-        tts = gTTS(text=clean_text, lang='ml', slow=True, tld='com.au')
-        tts.save(temp_audio.name)
+        audio_buffer = io.BytesIO(b''.join(audio_parts))
+        audio_buffer.name = 'voice.mp3'
         
-        logger.info(f"Generated audio file: {temp_audio.name}")
-        return temp_audio.name
+        logger.info(f"Generated audio file in memory ({audio_buffer.getbuffer().nbytes} bytes, {len(chunks)} chunks)")
+        return audio_buffer
         
     except Exception as e:
         logger.error(f"Error generating TTS: {e}")
         return None
 
-def cleanup_temp_file(file_path: str):
-    """Clean up temporary audio files"""
-    try:
-        if file_path and os.path.exists(file_path):
-            os.unlink(file_path)
-            logger.info(f"Cleaned up temp file: {file_path}")
-    except Exception as e:
-        logger.error(f"Error cleaning up temp file {file_path}: {e}")
-
 @bot.message_handler(commands=['start', 'help'])
 def send_welcome(message):
     """Handle /start and /help commands"""
-    bot_stats['total_messages'] += 1
-    bot_stats['last_activity'] = datetime.now()
+    with bot_stats_lock:
+        bot_stats['total_messages'] += 1
+        bot_stats['last_activity'] = datetime.now()
     
     welcome_text = """
 🔥 ദാ! മാവേലി കിംഗ് ഇൻ ദ ഹൗസ്! 🔥
@@ -337,8 +692,14 @@ def send_welcome(message):
 @bot.message_handler(func=lambda message: True)
 def handle_message(message):
     """Handle all text messages"""
-    bot_stats['total_messages'] += 1
-    bot_stats['last_activity'] = datetime.now()
+    # Stamp the message once: local time for bot_stats, UTC for the database
+    received_at = datetime.now()
+    received_at_utc = datetime.utcnow()
+    start_ns = time.perf_counter_ns()
+    
+    with bot_stats_lock:
+        bot_stats['total_messages'] += 1
+        bot_stats['last_activity'] = received_at
     
     user_id = message.from_user.id
     user_message = message.text
@@ -348,58 +709,71 @@ def handle_message(message):
     username = message.from_user.username
     last_name = message.from_user.last_name
     
-    # Create or update user in database (with error handling)
-    try:
-        db_manager.create_or_update_user(user_id, username, user_name, last_name)
-    except Exception as db_error:
-        logger.warning(f"Database user update failed: {db_error}")
+    # Update the user row on the I/O pool so it overlaps the rest of the handler
+    run_in_background(db_manager.create_or_update_user, user_id, username, user_name, last_name)
     
-    # Store user message for dashboard (keeping old format for compatibility)
-    bot_stats['recent_messages'].append({
-        'timestamp': datetime.now(),
+    # Store user message for dashboard (keeping old format for compatibility).
+    # Keep our own reference: with concurrent handlers [-1] may be another user's.
+    recent_entry = {
+        'timestamp': received_at,
         'user_id': user_id,
         'user_name': user_name,
         'username': username or "No username",
         'message': user_message[:200],  # Truncate long messages
         'response_sent': False
-    })
-    
-    # Keep only last 50 messages
-    if len(bot_stats['recent_messages']) > 50:
-        bot_stats['recent_messages'] = bot_stats['recent_messages'][-50:]
+    }
+    with bot_stats_lock:
+        bot_stats['recent_messages'].append(recent_entry)
     
     logger.info(f"Received message from user {user_id} ({user_name}): {user_message[:100]}...")
     
-    start_time = time.time()
-    
     try:
-        # Send typing indicator
-        bot.send_chat_action(message.chat.id, 'typing')
+        # One chat action for the whole reply (sent without waiting for Telegram's
+        # ack); the reply is always a voice message unless TTS fails
+        run_in_background(bot.send_chat_action, message.chat.id, 'upload_voice')
+        
+        # Read inline: it's served from the in-process context cache, and
+        # queueing it behind network calls on the I/O pool only adds latency.
+        # Cached replies are keyed on it too.
+        try:
+            context = db_manager.get_conversation_context(user_id, limit=3)
+        except Exception as db_error:
+            logger.warning(f"Database context retrieval failed: {db_error}")
+            context = ""
         
-        # Generate Malayalam response using Gemini with memory
-        malayalam_response = generate_maveli_response(user_message, user_id)
+        cached = get_cached_response(user_message, context)
+        if cached:
+            malayalam_response, cached_audio = cached
+            logger.info(f"Serving cached response to user {user_id}")
+        else:
+            # Generate Malayalam response using Gemini with memory
+            malayalam_response = generate_maveli_response_once(user_message, user_id, context=context)
+            cached_audio = None
         
         # Calculate response time
-        response_time_ms = int((time.time() - start_time) * 1000)
+        response_time_ms = (time.perf_counter_ns() - start_ns) // 1_000_000
         
-        # Convert to audio
-        bot.send_chat_action(message.chat.id, 'upload_voice')
-        audio_file_path = text_to_speech_malayalam(malayalam_response)
+        # Convert to audio (reusing the cached mp3 for repeat messages)
+        if cached_audio is not None:
+            audio_buffer = io.BytesIO(cached_audio)
+            audio_buffer.name = 'voice.mp3'
+        else:
+            audio_buffer = text_to_speech_malayalam(malayalam_response)
+            if audio_buffer is not None:
+                cache_response(user_message, context, malayalam_response, audio_buffer.getvalue())
         
-        if audio_file_path:
+        if audio_buffer is not None:
             # Send audio message with caption
-            with open(audio_file_path, 'rb') as audio_file:
-                bot.send_voice(
-                    message.chat.id,
-                    audio_file,
-                    caption=malayalam_response,
-                    reply_to_message_id=message.message_id
-                )
+            bot.send_voice(
+                message.chat.id,
+                audio_buffer,
+                caption=malayalam_response,
+                reply_to_message_id=message.message_id
+            )
             
-            # Clean up temp file
-            cleanup_temp_file(audio_file_path)
-            bot_stats['audio_generations'] += 1
-            bot_stats['successful_responses'] += 1
+            with bot_stats_lock:
+                bot_stats['audio_generations'] += 1
+                bot_stats['successful_responses'] += 1
             
             # Save conversation to database (with error handling)
             try:
@@ -408,15 +782,15 @@ def handle_message(message):
                     user_message=user_message,
                     bot_response=malayalam_response,
                     response_time_ms=response_time_ms,
-                    audio_generated=True
+                    audio_generated=True,
+                    timestamp=received_at_utc
                 )
             except Exception as db_error:
                 logger.warning(f"Database conversation save failed: {db_error}")
             
             # Mark response as sent in recent messages
-            if bot_stats['recent_messages']:
-                bot_stats['recent_messages'][-1]['response_sent'] = True
-                bot_stats['recent_messages'][-1]['response'] = malayalam_response[:100]
+            recent_entry['response_sent'] = True
+            recent_entry['response'] = malayalam_response[:100]
             
             logger.info(f"Successfully sent audio response to user {user_id} ({user_name})")
             
@@ -426,7 +800,8 @@ def handle_message(message):
                 message,
                 malayalam_response
             )
-            bot_stats['successful_responses'] += 1
+            with bot_stats_lock:
+                bot_stats['successful_responses'] += 1
             # Save conversation to database (with error handling)
             try:
                 db_manager.save_conversation(
@@ -434,20 +809,21 @@ def handle_message(message):
                     user_message=user_message,
                     bot_response=malayalam_response,
                     response_time_ms=response_time_ms,
-                    audio_generated=False
+                    audio_generated=False,
+                    timestamp=received_at_utc
                 )
             except Exception as db_error:
                 logger.warning(f"Database conversation save failed: {db_error}")
             
             # Mark response as sent in recent messages
-            if bot_stats['recent_messages']:
-                bot_stats['recent_messages'][-1]['response_sent'] = True
-                bot_stats['recent_messages'][-1]['response'] = malayalam_response[:100]
+            recent_entry['response_sent'] = True
+            recent_entry['response'] = malayalam_response[:100]
             
             logger.warning(f"Audio generation failed, sent text response to user {user_id} ({user_name})")
             
     except Exception as e:
-        bot_stats['failed_responses'] += 1
+        with bot_stats_lock:
+            bot_stats['failed_responses'] += 1
         logger.error(f"Error handling message from user {user_id}: {e}")
         
         # Send error message in Malayalam
@@ -462,21 +838,30 @@ def handle_message(message):
 def send_stats(message):
     """Send bot statistics (for admin use)"""
     if message.from_user.id == int(os.getenv('ADMIN_USER_ID', '0')):  # Only for admin
-        uptime = datetime.now() - bot_stats['start_time']
+        # Read one consistent snapshot while handler threads keep updating
+        with bot_stats_lock:
+            stats = dict(bot_stats)
+        uptime = datetime.now() - stats['start_time']
         stats_text = f"""
 📊 മാവേലി ബോട്ട് സ്ഥിതിവിവരം:
 
 ⏱️ പ്രവർത്തന സമയം: {uptime.days} ദിവസങ്ങൾ, {uptime.seconds // 3600} മണിക്കൂർ
-📨 ആകെ സന്ദേശങ്ങൾ: {bot_stats['total_messages']}
-✅ വിജയകരമായ മറുപടികൾ: {bot_stats['successful_responses']}
-❌ പരാജയപ്പെട്ട മറുപടികൾ: {bot_stats['failed_responses']}
-🎵 ഓഡിയോ സന്ദേശങ്ങൾ: {bot_stats['audio_generations']}
-🕐 അവസാന പ്രവർത്തനം: {bot_stats['last_activity'].strftime('%Y-%m-%d %H:%M:%S') if bot_stats['last_activity'] else 'N/A'}
+📨 ആകെ സന്ദേശങ്ങൾ: {stats['total_messages']}
+✅ വിജയകരമായ മറുപടികൾ: {stats['successful_responses']}
+❌ പരാജയപ്പെട്ട മറുപടികൾ: {stats['failed_responses']}
+🎵 ഓഡിയോ സന്ദേശങ്ങൾ: {stats['audio_generations']}
+🕐 അവസാന പ്രവർത്തനം: {stats['last_activity'].strftime('%Y-%m-%d %H:%M:%S') if stats['last_activity'] else 'N/A'}
         """
         bot.reply_to(message, stats_text)
     else:
         bot.reply_to(message, "ക്ഷമിക്കണം, ഈ കമാൻഡ് അഡ്മിൻ മാത്രമേ ഉപയോഗിക്കാൻ കഴിയൂ.")
 
+def _run_once():
+    """Poll Telegram until polling stops or raises"""
+    # Long polling already blocks until Telegram has updates, so don't sleep
+    # between retrievals; the handler thread pool processes each batch concurrently.
+    bot.polling(none_stop=True, interval=0, timeout=30)
+
 def main():
     """Main function to start the bot"""
     logger.info("🎭 മാവേലി ബോട്ട് ആരംഭിക്കുന്നു...")
@@ -494,16 +879,22 @@ def main():
             else:
                 logger.error("Failed to connect to Telegram after all retries")
     
-    try:
-        # Start polling with better error handling
-        bot.polling(none_stop=True, interval=1, timeout=30)
-    except KeyboardInterrupt:
-        logger.info("Bot stopped by user")
-    except Exception as e:
-        logger.error(f"Bot crashed: {e}")
-        # Restart after a longer delay for connection issues
-        time.sleep(10)
-        main()
+    # Create the system prompt cache up front so the first messages can use it
+    refresh_system_prompt_cache()
+    
+    # Restart polling in a loop rather than recursing, so repeated crashes
+    # don't grow the stack or keep old frames alive
+    while True:
+        try:
+            _run_once()
+            break
+        except KeyboardInterrupt:
+            logger.info("Bot stopped by user")
+            break
+        except Exception as e:
+            logger.error(f"Bot crashed: {e}")
+            # Restart after a longer delay for connection issues
+            time.sleep(10)
 
 if __name__ == '__main__':
     main()
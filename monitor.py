@@ -1,99 +1,189 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
 import os
 import json
-import time
+from collections import deque
+import multiprocessing
+import re
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 
+from log_parsing import LOG_COLUMNS, parse_chunk, parse_log_entry
+
+# Spawned full-scan workers re-import this script as __mp_main__; only the
+# dashboard process itself should open the database
+DATABASE_AVAILABLE = False
+if __name__ != '__mp_main__':
+    try:
+        from database import db_manager
+        DATABASE_AVAILABLE = True
+    except ImportError:
+        DATABASE_AVAILABLE = False
+
+# Serialize charts for the frontend with orjson when it's installed
 try:
-    from database import db_manager
-    DATABASE_AVAILABLE = True
+    import orjson  # noqa: F401
+    import plotly.io as pio
+    pio.json.config.default_engine = 'orjson'
+    ORJSON_AVAILABLE = True
 except ImportError:
-    DATABASE_AVAILABLE = False
+    ORJSON_AVAILABLE = False
 
-# Configure Streamlit page
-st.set_page_config(
-    page_title="Maveli Bot Monitor",
-    page_icon="🎭",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
+TAIL_CHUNK_SIZE = 65536
+# Appends larger than this are tail-read instead of parsed in full
+MAX_INCREMENTAL_BYTES = 4 * TAIL_CHUNK_SIZE
+PARALLEL_SCAN_MIN_LINES = 200_000
 
-# Custom CSS for dashboard
-st.markdown("""
-<style>
-.dashboard-text {
-    font-family: 'Inter', sans-serif;
-    direction: ltr;
-}
-.metric-card {
-    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-    padding: 20px;
-    border-radius: 10px;
-    color: white;
-    text-align: center;
-}
-.status-good {
-    background: linear-gradient(135deg, #11998e 0%, #38ef7d 100%);
-}
-.status-warning {
-    background: linear-gradient(135deg, #fdc830 0%, #f37335 100%);
-}
-.status-error {
-    background: linear-gradient(135deg, #fc4a1a 0%, #f7b733 100%);
+# Parse pattern: "Received message from user 773052725 (John): Hello world..."
+_USER_RE = re.compile(r'Received message from user (\d+) \(([^)]+)\): (.+)')
+
+MAX_LOG_ENTRIES = 1000
+MAX_CHART_HOURS = 168
+
+# Log level -> stats counter it increments
+LEVEL_KEYS = {
+    'INFO': 'info_count',
+    'WARNING': 'warning_count',
+    'ERROR': 'error_count'
 }
-</style>
-""", unsafe_allow_html=True)
 
-def load_bot_logs():
-    """Load bot logs from file"""
+def tail_lines(f, end, n=1000):
+    """Read the last n non-empty lines before byte offset end by seeking back through f"""
+    pos = end
+    buf = b''
+    lines = []
+    while pos > 0:
+        read_size = min(TAIL_CHUNK_SIZE, pos)
+        pos -= read_size
+        f.seek(pos)
+        buf = f.read(read_size) + buf
+        lines = buf.splitlines()
+        if pos > 0:
+            # The first line may have been cut mid-way by the chunk boundary
+            lines = lines[1:]
+        lines = [line.strip() for line in lines if line.strip()]
+        if len(lines) >= n:
+            break
+    
+    return [line.decode('utf-8', 'replace') for line in lines[-n:]]
+
+def get_log_state():
+    """Per-session read offset, log window and stats kept across reruns"""
+    if 'log_state' not in st.session_state:
+        st.session_state['log_state'] = {
+            'offset': 0,
+            # Parse result (or None) for each of the last MAX_LOG_ENTRIES raw lines
+            'window': deque(maxlen=MAX_LOG_ENTRIES),
+            'parsed': pd.DataFrame(columns=LOG_COLUMNS),
+            'stats': None,
+            'log_available': False
+        }
+    return st.session_state['log_state']
+
+def load_bot_logs(log_state):
+    """Load the log lines appended since the last call, advancing log_state['offset']"""
     log_file = Path("bot.log")
-    if not log_file.exists():
+    # Recorded here so the System Information section needn't stat the file again
+    log_state['log_available'] = log_file.exists()
+    if not log_state['log_available']:
         return []
     
-    logs = []
     try:
-        with open(log_file, 'r', encoding='utf-8') as f:
-            for line in f.readlines():
-                if line.strip():
-                    logs.append(line.strip())
+        with open(log_file, 'rb') as f:
+            end = f.seek(0, os.SEEK_END)
+            if end < log_state['offset']:
+                # The log was truncated or rotated; start again from its tail
+                log_state['offset'] = 0
+                log_state['window'].clear()
+                log_state['parsed'] = pd.DataFrame(columns=LOG_COLUMNS)
+                log_state['stats'] = None
+            offset = log_state['offset']
+            if end == offset:
+                return []
+            
+            if offset == 0 or end - offset > MAX_INCREMENTAL_BYTES:
+                # First read, or so much was appended that the window would be
+                # replaced anyway: only the last MAX_LOG_ENTRIES lines are needed.
+                # Stop at the last newline so a half-written line is read next time.
+                log_state['window'].clear()
+                f.seek(max(0, end - TAIL_CHUNK_SIZE))
+                last_chunk = f.read()
+                end -= len(last_chunk) - (last_chunk.rfind(b'\n') + 1)
+                lines = tail_lines(f, end, MAX_LOG_ENTRIES)
+            else:
+                f.seek(offset)
+                data = f.read(end - offset)
+                data = data[:data.rfind(b'\n') + 1]
+                end = offset + len(data)
+                lines = [line.strip().decode('utf-8', 'replace') for line in data.splitlines() if line.strip()]
+            
+            log_state['offset'] = end
+            return lines
     except Exception as e:
         st.error(f"Error reading log file: {e}")
+        return []
+
+def truncate_messages(messages, limit):
+    """Cut each message to limit characters, marking cut ones with '...'"""
+    return pd.Series(
+        np.where(messages.str.len() > limit, messages.str.slice(0, limit) + '...', messages),
+        index=messages.index
+    )
+
+def make_log_frame(data):
+    """Build the parsed-log frame, storing the repetitive columns as categoricals"""
+    df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data, columns=LOG_COLUMNS)
+    return df.astype({'logger': 'category', 'level': 'category'})
+
+def get_bot_statistics():
+    """Get bot statistics and the parsed log entries, parsing only newly appended lines"""
+    log_state = get_log_state()
+    new_lines = load_bot_logs(log_state)
+    if new_lines or log_state['stats'] is None:
+        window = log_state['window']
+        if new_lines:
+            window.extend(map(parse_log_entry, new_lines))
+            log_state['parsed'] = make_log_frame([entry for entry in window if entry])
+        log_state['stats'] = compute_bot_statistics(log_state['parsed'], len(window))
     
-    return logs[-1000:]  # Get last 1000 log entries
+    return log_state['stats'], log_state['parsed']
 
-def parse_log_entry(log_line):
-    """Parse a log entry to extract information"""
-    try:
-        parts = log_line.split(' - ', 3)
-        if len(parts) >= 4:
-            timestamp_str = parts[0]
-            logger_name = parts[1]
-            level = parts[2]
-            message = parts[3]
-            
-            # Parse timestamp
-            timestamp = datetime.strptime(timestamp_str, '%Y-%m-%d %H:%M:%S,%f')
-            
-            return {
-                'timestamp': timestamp,
-                'logger': logger_name,
-                'level': level,
-                'message': message
-            }
-    except Exception:
-        pass
+def full_scan_statistics():
+    """Parse the whole of bot.log across worker processes and aggregate it"""
+    log_file = Path("bot.log")
+    lines = []
+    if log_file.exists():
+        with open(log_file, 'rb') as f:
+            lines = [line.strip().decode('utf-8', 'replace') for line in f if line.strip()]
     
-    return None
+    # Spawning workers costs a few seconds, so only large logs are split up
+    workers = (os.cpu_count() or 1) if len(lines) >= PARALLEL_SCAN_MIN_LINES else 1
+    chunk_size = max(1, -(-len(lines) // workers))
+    chunks = [lines[i:i + chunk_size] for i in range(0, len(lines), chunk_size)]
+    if len(chunks) > 1:
+        # Spawned workers start clean rather than forking the multi-threaded
+        # Streamlit server; the parser lives in log_parsing so they can import it
+        mp_context = multiprocessing.get_context('spawn')
+        try:
+            with ProcessPoolExecutor(max_workers=len(chunks), mp_context=mp_context) as executor:
+                parts = list(executor.map(parse_chunk, chunks))
+        except (BrokenProcessPool, OSError) as e:
+            st.warning(f"Parallel log scan failed, scanning in-process: {e}")
+            parts = [parse_chunk(lines)]
+    else:
+        parts = [parse_chunk(lines)]
+    
+    df = make_log_frame([entry for part in parts for entry in part])
+    return compute_bot_statistics(df, len(lines))
 
-def get_bot_statistics():
-    """Get bot statistics from logs"""
-    logs = load_bot_logs()
+def compute_bot_statistics(df, total_logs):
+    """Aggregate bot statistics from the parsed entries of total_logs raw log lines"""
     stats = {
-        'total_logs': len(logs),
+        'total_logs': total_logs,
         'error_count': 0,
         'warning_count': 0,
         'info_count': 0,
@@ -105,78 +195,132 @@ def get_bot_statistics():
         'recent_user_messages': []
     }
     
-    for log_line in logs:
-        entry = parse_log_entry(log_line)
-        if not entry:
-            continue
-        
-        # Count by level
-        if entry['level'] == 'ERROR':
-            stats['error_count'] += 1
-        elif entry['level'] == 'WARNING':
-            stats['warning_count'] += 1
-        elif entry['level'] == 'INFO':
-            stats['info_count'] += 1
-        
-        # Count specific activities
-        message = entry['message'].lower()
-        if 'received message from user' in message:
-            stats['user_messages'] += 1
-            # Extract user message details
-            try:
-                import re
-                # Parse pattern: "Received message from user 773052725 (John): Hello world..."
-                match = re.search(r'received message from user (\d+) \(([^)]+)\): (.+)', entry['message'])
-                if match:
-                    user_id = match.group(1)
-                    user_name = match.group(2)
-                    user_message = match.group(3)
-                    
-                    stats['recent_user_messages'].append({
-                        'timestamp': entry['timestamp'],
-                        'user_id': user_id,
-                        'user_name': user_name,
-                        'message': user_message[:150] + ('...' if len(user_message) > 150 else '')
-                    })
-            except Exception:
-                pass
-        elif 'generated audio file' in message:
-            stats['audio_generations'] += 1
-        elif 'generated gemini response' in message:
-            stats['gemini_requests'] += 1
-        
-        # Track hourly activity
-        hour_key = entry['timestamp'].strftime('%Y-%m-%d %H:00')
-        stats['hourly_activity'][hour_key] = stats['hourly_activity'].get(hour_key, 0) + 1
-        
-        # Update last activity
-        if stats['last_activity'] is None or entry['timestamp'] > stats['last_activity']:
-            stats['last_activity'] = entry['timestamp']
+    if df.empty:
+        return stats
+    
+    # Count by level
+    level_counts = df['level'].value_counts()
+    for level, level_key in LEVEL_KEYS.items():
+        stats[level_key] = int(level_counts.get(level, 0))
+    
+    # Count specific activities (each line counts towards at most one)
+    messages = df['message']
+    # Matched against the exact casing main.py logs, so no lowercased copies are made
+    user_mask = messages.str.contains('Received message from user', regex=False)
+    audio_mask = ~user_mask & messages.str.contains('Generated audio file', regex=False)
+    gemini_mask = ~user_mask & ~audio_mask & messages.str.contains('generated Gemini response', regex=False)
+    stats['user_messages'] = int(user_mask.sum())
+    stats['audio_generations'] = int(audio_mask.sum())
+    stats['gemini_requests'] = int(gemini_mask.sum())
     
-    # Keep only last 20 user messages
-    stats['recent_user_messages'] = stats['recent_user_messages'][-20:]
+    # Extract user message details in one pass over the matching rows
+    recent = messages[user_mask].str.extract(_USER_RE).dropna().tail(20)
+    recent.columns = ['user_id', 'user_name', 'message']
+    recent['timestamp'] = df.loc[recent.index, 'timestamp']
+    recent['message'] = truncate_messages(recent['message'], 150)
+    stats['recent_user_messages'] = recent[['timestamp', 'user_id', 'user_name', 'message']].to_dict('records')
+    
+    # Track hourly activity
+    hourly = df.groupby(df['timestamp'].dt.floor('h')).size()
+    stats['hourly_activity'] = {hour.strftime('%Y-%m-%d %H:00'): int(count) for hour, count in hourly.items()}
+    
+    # Update last activity
+    stats['last_activity'] = df['timestamp'].max().to_pydatetime()
     
     return stats
 
+# Custom CSS for dashboard
+DASHBOARD_CSS = """
+<style>
+.dashboard-text {
+    font-family: 'Inter', sans-serif;
+    direction: ltr;
+}
+.metric-card {
+    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+    padding: 20px;
+    border-radius: 10px;
+    color: white;
+    text-align: center;
+}
+.cards-row {
+    display: flex;
+    gap: 16px;
+}
+.cards-row .metric-card {
+    flex: 1;
+}
+.status-good {
+    background: linear-gradient(135deg, #11998e 0%, #38ef7d 100%);
+}
+.status-warning {
+    background: linear-gradient(135deg, #fdc830 0%, #f37335 100%);
+}
+.status-error {
+    background: linear-gradient(135deg, #fc4a1a 0%, #f7b733 100%);
+}
+</style>
+"""
+
+def configure_page():
+    """Set the page config and dashboard CSS"""
+    # Called from main rather than at import: spawned full-scan workers
+    # re-import this script and must not touch Streamlit
+    st.set_page_config(
+        page_title="Maveli Bot Monitor",
+        page_icon="🎭",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+    st.markdown(DASHBOARD_CSS, unsafe_allow_html=True)
+
 def main():
+    configure_page()
+    
     st.title("🎭 Maveli Bot Monitoring Dashboard")
     st.markdown('<div class="dashboard-text">', unsafe_allow_html=True)
     
+    # Environment variables don't change within a session; check them once
+    if 'env_status' not in st.session_state:
+        st.session_state['env_status'] = {
+            key: bool(os.getenv(key)) for key in ('TELEGRAM_API_KEY', 'GEMINI_API_KEY', 'ADMIN_USER_ID')
+        }
+    
     # Sidebar
     st.sidebar.header("⚙️ Controls")
     auto_refresh = st.sidebar.checkbox("🔄 Auto Refresh", value=True)
     refresh_interval = st.sidebar.slider("Refresh Interval (seconds)", 5, 60, 10)
     
-    if auto_refresh:
-        time.sleep(refresh_interval)
-        st.rerun()
-    
     # Manual refresh button
     if st.sidebar.button("🔄 Refresh Now"):
         st.rerun()
     
-    # Load statistics
-    stats = get_bot_statistics()
+    # The live panel covers the last 1000 entries; a full scan parses the whole log
+    full_scan = st.sidebar.button("🔍 Full Log Scan")
+    
+    # Only the data-dependent panel re-runs on the timer; the page layout and
+    # sidebar are left alone between ticks
+    st.fragment(run_every=refresh_interval if auto_refresh else None)(live_panel)()
+    
+    if full_scan:
+        with st.spinner("Scanning the full log..."):
+            full_stats = full_scan_statistics()
+        
+        st.markdown("---")
+        st.subheader("🔍 Full Log Scan")
+        col1, col2, col3, col4, col5 = st.columns(5)
+        col1.metric("Total Logs", full_stats['total_logs'])
+        col2.metric("User Messages", full_stats['user_messages'])
+        col3.metric("Audio Generated", full_stats['audio_generations'])
+        col4.metric("AI Responses", full_stats['gemini_requests'])
+        col5.metric("Errors", full_stats['error_count'])
+    
+    st.markdown('</div>', unsafe_allow_html=True)
+
+def live_panel():
+    """Render the metrics, charts and log sections from the current bot.log"""
+    # Load statistics; only lines appended since the last refresh are parsed
+    stats, parsed = get_bot_statistics()
     
     # Status indicator
     now = datetime.now()
@@ -195,45 +339,19 @@ def main():
         status = "⚫ Unknown"
         status_class = "status-error"
     
-    # Main metrics row
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        st.markdown(f"""
-        <div class="metric-card {status_class}">
-            <h3>Bot Status</h3>
-            <h2>{status}</h2>
-            <p>Last Activity:<br>
-            {stats['last_activity'].strftime('%Y-%m-%d %H:%M:%S') if stats['last_activity'] else 'Unknown'}</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col2:
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3>User Messages</h3>
-            <h2>{stats['user_messages']}</h2>
-            <p>Total messages received</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col3:
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3>Audio Generated</h3>
-            <h2>{stats['audio_generations']}</h2>
-            <p>Voice messages created</p>
-        </div>
-        """, unsafe_allow_html=True)
-    
-    with col4:
-        st.markdown(f"""
-        <div class="metric-card">
-            <h3>AI Responses</h3>
-            <h2>{stats['gemini_requests']}</h2>
-            <p>Gemini AI calls made</p>
-        </div>
-        """, unsafe_allow_html=True)
+    # Main metrics row, emitted as one HTML block instead of four column widgets
+    last_activity_text = stats['last_activity'].strftime('%Y-%m-%d %H:%M:%S') if stats['last_activity'] else 'Unknown'
+    cards = [
+        (f"metric-card {status_class}", "Bot Status", status, f"Last Activity:<br>{last_activity_text}"),
+        ("metric-card", "User Messages", stats['user_messages'], "Total messages received"),
+        ("metric-card", "Audio Generated", stats['audio_generations'], "Voice messages created"),
+        ("metric-card", "AI Responses", stats['gemini_requests'], "Gemini AI calls made"),
+    ]
+    card_html = ''.join(
+        f'<div class="{css_class}"><h3>{title}</h3><h2>{value}</h2><p>{caption}</p></div>'
+        for css_class, title, value, caption in cards
+    )
+    st.markdown(f'<div class="cards-row">{card_html}</div>', unsafe_allow_html=True)
     
     # Charts row
     st.markdown("---")
@@ -249,32 +367,47 @@ def main():
             'ERROR': stats['error_count']
         }
         
-        fig_pie = px.pie(
-            values=list(log_levels.values()),
-            names=list(log_levels.keys()),
-            title="Log Types",
-            color_discrete_map={
-                'INFO': '#2E8B57',
-                'WARNING': '#FFD700',
-                'ERROR': '#DC143C'
+        # Plain figure dicts skip plotly.express's figure building per refresh
+        # (st.plotly_chart still converts them to a validated go.Figure).
+        # No transitions, and a fixed uirevision keeps zoom/legend state across refreshes.
+        fig_pie = {
+            'data': [{
+                'type': 'pie',
+                'labels': list(log_levels.keys()),
+                'values': list(log_levels.values()),
+                'marker': {'colors': ['#2E8B57', '#FFD700', '#DC143C']}
+            }],
+            'layout': {
+                'title': {'text': "Log Types"},
+                'transition': {'duration': 0},
+                'uirevision': 'static'
             }
-        )
+        }
         st.plotly_chart(fig_pie, use_container_width=True)
     
     with col2:
         st.subheader("📈 Hourly Activity")
         
         if stats['hourly_activity']:
-            hours = sorted(stats['hourly_activity'].keys())
+            # Keep the chart bounded to the most recent week of hours
+            hours = sorted(stats['hourly_activity'].keys())[-MAX_CHART_HOURS:]
             activity_counts = [stats['hourly_activity'][hour] for hour in hours]
             
-            fig_line = px.line(
-                x=hours,
-                y=activity_counts,
-                title="Activity by Hour",
-                labels={'x': 'Time', 'y': 'Activity Count'}
-            )
-            fig_line.update_layout(xaxis_tickangle=-45)
+            fig_line = {
+                'data': [{
+                    'type': 'scattergl',  # WebGL, stays fast as hours accumulate
+                    'mode': 'lines+markers',
+                    'x': hours,
+                    'y': activity_counts
+                }],
+                'layout': {
+                    'title': {'text': "Activity by Hour"},
+                    'transition': {'duration': 0},
+                    'uirevision': 'static',
+                    'xaxis': {'title': {'text': 'Time'}, 'tickangle': -45},
+                    'yaxis': {'title': {'text': 'Activity Count'}}
+                }
+            }
             st.plotly_chart(fig_line, use_container_width=True)
         else:
             st.info("No hourly activity data available")
@@ -305,15 +438,20 @@ def main():
         st.subheader("🎯 User Engagement")
         
         if stats['recent_user_messages']:
-            # Count unique users
-            unique_users = len(set(msg['user_id'] for msg in stats['recent_user_messages']))
-            total_messages = len(stats['recent_user_messages'])
+            # Count unique users, messages and total length in one pass
+            seen_users = set()
+            total_messages = 0
+            total_length = 0
+            for msg in stats['recent_user_messages']:
+                seen_users.add(msg['user_id'])
+                total_messages += 1
+                total_length += len(msg['message'])
             
-            st.metric("Unique Users", unique_users)
+            st.metric("Unique Users", len(seen_users))
             st.metric("Total Messages", total_messages)
             
             if total_messages > 0:
-                avg_msg_length = sum(len(msg['message']) for msg in stats['recent_user_messages']) / total_messages
+                avg_msg_length = total_length / total_messages
                 st.metric("Avg Message Length", f"{avg_msg_length:.0f} chars")
         else:
             st.info("No user engagement data yet")
@@ -322,23 +460,15 @@ def main():
     st.markdown("---")
     st.subheader("📝 Recent Logs")
     
-    logs = load_bot_logs()
-    recent_logs = logs[-50:]  # Show last 50 logs
-    
-    if recent_logs:
-        log_data = []
-        for log_line in recent_logs:
-            entry = parse_log_entry(log_line)
-            if entry:
-                log_data.append({
-                    'Time': entry['timestamp'].strftime('%H:%M:%S'),
-                    'Level': entry['level'],
-                    'Message': entry['message'][:100] + ('...' if len(entry['message']) > 100 else '')
-                })
-        
-        if log_data:
-            df = pd.DataFrame(log_data)
-            st.dataframe(df, use_container_width=True, height=400)
+    recent_logs = parsed.tail(50)  # Show last 50 logs
+    
+    if not recent_logs.empty:
+        df = pd.DataFrame({
+            'Time': recent_logs['timestamp'].dt.strftime('%H:%M:%S'),
+            'Level': recent_logs['level'],
+            'Message': truncate_messages(recent_logs['message'], 100)
+        })
+        st.dataframe(df, use_container_width=True, height=400)
     else:
         st.info("No log entries available")
     
@@ -353,18 +483,18 @@ def main():
         **Dashboard Information:**
         - Update Time: {now.strftime('%Y-%m-%d %H:%M:%S')}
         - Total Logs: {stats['total_logs']}
-        - Log File: {'✅ Available' if Path('bot.log').exists() else '❌ Not Available'}
+        - Log File: {'✅ Available' if get_log_state()['log_available'] else '❌ Not Available'}
+        - Chart JSON: {'orjson' if ORJSON_AVAILABLE else 'json (orjson not installed)'}
         """)
     
+    env_status = st.session_state['env_status']
     with col2:
         st.info(f"""
         **Environment Variables:**
-        - TELEGRAM_API_KEY: {'✅ Set' if os.getenv('TELEGRAM_API_KEY') else '❌ Not Available'}
-        - GEMINI_API_KEY: {'✅ Set' if os.getenv('GEMINI_API_KEY') else '❌ Not Available'}
-        - ADMIN_USER_ID: {'✅ Set' if os.getenv('ADMIN_USER_ID') else '❌ Not Available'}
+        - TELEGRAM_API_KEY: {'✅ Set' if env_status['TELEGRAM_API_KEY'] else '❌ Not Available'}
+        - GEMINI_API_KEY: {'✅ Set' if env_status['GEMINI_API_KEY'] else '❌ Not Available'}
+        - ADMIN_USER_ID: {'✅ Set' if env_status['ADMIN_USER_ID'] else '❌ Not Available'}
         """)
-    
-    st.markdown('</div>', unsafe_allow_html=True)
 
 if __name__ == "__main__":
     main()